@@ -0,0 +1,1271 @@
+#!/usr/bin/python3
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import math
+import os
+import random
+import shutil
+import string
+import subprocess
+import sys
+import threading
+import time
+import dataclasses
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+NS_PER_SECOND = 1_000_000_000
+
+WARMUP_DURATION_SECONDS = 0.5
+CALIBRATION_MIN_ITERATIONS = 100
+CALIBRATION_MAX_ITERATIONS = 10_000_000
+CALIBRATION_MIN_TIME_SECONDS = 0.1
+DEFAULT_SAMPLE_COUNT = 10
+
+# Scale factor that makes the median absolute deviation a consistent
+# estimator for the standard deviation of normally distributed samples.
+MAD_NORMAL_SCALE_FACTOR = 1.4826
+
+SCRIPT_END_STDERR_MARKER = "__BRUSH_END__"
+SCRIPT_END_STDOUT_MARKER = "__BRUSH_END_OUT__"
+
+
+@dataclass
+class BenchmarkCase:
+    description: str
+    loop_body: str
+    setup: Optional[str] = None
+    cleanup: Optional[str] = None
+
+
+BENCHMARK_CASES: Dict[str, BenchmarkCase] = {
+    "colon": BenchmarkCase(
+        description="No-op builtin",
+        loop_body=":",
+    ),
+    "assignment": BenchmarkCase(
+        description="Scalar variable assignment",
+        loop_body="x=1",
+        cleanup="unset x",
+    ),
+    "arith": BenchmarkCase(
+        description="Arithmetic expansion",
+        loop_body=": $((i * 3 + 1))",
+    ),
+    "echo_builtin": BenchmarkCase(
+        description="echo builtin (output discarded)",
+        loop_body="echo hello >/dev/null",
+    ),
+    "subshell": BenchmarkCase(
+        description="Subshell running a no-op",
+        loop_body="( : )",
+    ),
+    "cmdsubst": BenchmarkCase(
+        description="Command substitution",
+        loop_body="x=$(echo hello)",
+        cleanup="unset x",
+    ),
+    "pattern_match": BenchmarkCase(
+        description="Glob pattern match in [[ ]]",
+        loop_body="[[ abc == a* ]]",
+    ),
+    "regex_match": BenchmarkCase(
+        description="Regex match in [[ ]]",
+        loop_body="[[ abc =~ ^a.c$ ]]",
+    ),
+    "if_taken": BenchmarkCase(
+        description="Conditional with taken branch",
+        loop_body="if true; then :; fi",
+    ),
+    "if_not_taken": BenchmarkCase(
+        description="Conditional with untaken branch",
+        loop_body="if false; then :; fi",
+    ),
+    "function_call": BenchmarkCase(
+        description="Calling a no-op shell function",
+        setup="myfunc() { :; }",
+        loop_body="myfunc",
+        cleanup="unset -f myfunc",
+    ),
+    "string_concat": BenchmarkCase(
+        description="Appending to a string variable",
+        setup="myvar=''",
+        loop_body="myvar+=abc",
+        cleanup="unset myvar",
+    ),
+    "array_push": BenchmarkCase(
+        description="Appending to an indexed array",
+        setup="myarr=()",
+        loop_body="myarr+=(element)",
+        cleanup="unset myarr",
+    ),
+}
+
+
+@dataclass
+class TimingResult:
+    real_seconds: float
+    user_seconds: float
+    sys_seconds: float
+
+
+@dataclass
+class BenchmarkResult:
+    case_name: str
+    sample_count: int
+    iterations_per_sample: int
+    median_ns: float
+    mad_ns: float
+    min_ns: float
+    max_ns: float
+    ci_low_ns: Optional[float] = None
+    ci_high_ns: Optional[float] = None
+
+
+@functools.lru_cache(maxsize=8)
+def resolve_shell_path(shell: str) -> str:
+    if "/" in shell:
+        return shell
+
+    resolved = shutil.which(shell)
+    if not resolved:
+        sys.stderr.write(f"error: couldn't find shell: {shell}\n")
+        sys.exit(1)
+
+    return resolved
+
+
+@functools.lru_cache(maxsize=8)
+def get_shell_flags(shell_path: str) -> Tuple[str, ...]:
+    shell_name = os.path.basename(shell_path)
+
+    if "bash" in shell_name or "brush" in shell_name:
+        return ("--noprofile", "--norc")
+
+    return ()
+
+
+# Maps shell path -> whether the shell supports $EPOCHREALTIME.
+_EPOCHREALTIME_SUPPORT: Dict[str, bool] = {}
+
+# Shell paths that have already had a full warmup this process.
+_WARMED_SHELLS: set = set()
+
+
+class ShellSession:
+    """A long-lived shell process that timed scripts are fed into.
+
+    Using one persistent shell per (shell, case) pair amortizes shell
+    startup cost across the warmup, calibration, and sample phases instead
+    of paying it on every fork.
+    """
+
+    def __init__(self, shell_path: str):
+        self.shell_path = shell_path
+        # close_fds=False keeps us on CPython's posix_spawn fast path on
+        # Linux (the default close_fds=True forces a full fork + fd walk).
+        # The harness holds no sensitive fds worth hiding from the shell.
+        # Run with a minimal, C-locale environment: LC_ALL=C pins the
+        # decimal separator in $EPOCHREALTIME and `time` output, and a
+        # small env keeps each fork from copying the caller's full
+        # environment block.
+        env = {
+            "LC_ALL": "C",
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+            "HOME": os.environ.get("HOME", "/"),
+            "TERM": "dumb",
+        }
+        self.proc = subprocess.Popen(
+            [shell_path, *get_shell_flags(shell_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            close_fds=False,
+            env=env,
+        )
+
+        # Prefer timing with $EPOCHREALTIME read inside the shell; it avoids
+        # the `time` builtin's formatting and TIMEFORMAT quirks. Fall back to
+        # `time` for shells that don't support it. The capability is a
+        # property of the shell binary, so probe it once per shell path
+        # rather than once per session.
+        if shell_path not in _EPOCHREALTIME_SUPPORT:
+            probe = (
+                '[[ -n "$EPOCHREALTIME" ]] && echo yes\n'
+                f"echo {SCRIPT_END_STDERR_MARKER} >&2\n"
+                f"echo {SCRIPT_END_STDOUT_MARKER}\n"
+            )
+            stdout, _ = self.run_script(probe)
+            _EPOCHREALTIME_SUPPORT[shell_path] = stdout.strip() == "yes"
+
+        self.supports_epochrealtime = _EPOCHREALTIME_SUPPORT[shell_path]
+
+    def run_script(
+        self,
+        script: str,
+        max_stdout_lines: Optional[int] = None,
+        max_stderr_lines: Optional[int] = None,
+    ) -> Tuple[str, str]:
+        assert self.proc.stdin and self.proc.stdout and self.proc.stderr
+
+        self.proc.stdin.write(script)
+        if not script.endswith("\n"):
+            self.proc.stdin.write("\n")
+        self.proc.stdin.flush()
+
+        # Retain only the tail of each stream when the caller knows how many
+        # lines it needs; a loop body that chatters on stdout/stderr then
+        # streams through a bounded deque instead of ballooning RSS.
+        #
+        # The two pipes must be drained concurrently: a batched sample run
+        # prints one timing line per sample on stdout and only emits the
+        # stderr end marker after the whole loop, so once stdout outgrows
+        # the pipe's capacity the shell blocks in printf while a
+        # stderr-first reader blocks on the marker — a deadlock. A helper
+        # thread drains stderr while this thread reads stdout, so neither
+        # pipe can fill regardless of which stream the script favors.
+        stderr_lines: collections.deque = collections.deque(maxlen=max_stderr_lines)
+        stderr_marker_seen = False
+
+        def drain_stderr():
+            nonlocal stderr_marker_seen
+            for line in self.proc.stderr:
+                if line.rstrip("\n") == SCRIPT_END_STDERR_MARKER:
+                    stderr_marker_seen = True
+                    return
+                stderr_lines.append(line)
+
+        stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+        stderr_thread.start()
+
+        stdout_lines: collections.deque = collections.deque(maxlen=max_stdout_lines)
+        for line in self.proc.stdout:
+            if line.rstrip("\n") == SCRIPT_END_STDOUT_MARKER:
+                break
+            stdout_lines.append(line)
+        else:
+            raise RuntimeError(f"shell exited unexpectedly: {self.shell_path}")
+
+        stderr_thread.join()
+        if not stderr_marker_seen:
+            raise RuntimeError(f"shell exited unexpectedly: {self.shell_path}")
+
+        return "".join(stdout_lines), "".join(stderr_lines)
+
+    def close(self):
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+        if self.proc.stdout:
+            self.proc.stdout.close()
+        if self.proc.stderr:
+            self.proc.stderr.close()
+
+
+SAMPLE_END_MARKER = "__BRUSH_SAMPLE_END__"
+
+# Number of copies of the loop body emitted per shell-loop iteration. The
+# arithmetic for-loop's own increment/compare costs as much as a cheap body,
+# so unrolling keeps loop bookkeeping out of what we're measuring. Iteration
+# counts fed to generate_benchmark_script must be multiples of this.
+LOOP_UNROLL = 100
+
+
+def _build_script_template(case: BenchmarkCase, use_epochrealtime: bool) -> string.Template:
+    # Shell text goes through string.Template, so literal '$'s in the case
+    # (and in our own shell code) have to be escaped as '$$'.
+    setup = case.setup.replace("$", "$$") if case.setup else None
+    loop_body = case.loop_body.replace("$", "$$")
+    cleanup = case.cleanup.replace("$", "$$") if case.cleanup else None
+
+    lines = []
+
+    if not use_epochrealtime:
+        # Three plain seconds values on one line; trivially machine-readable
+        # and independent of any shell's default `time` formatting.
+        lines.append("TIMEFORMAT='%R %U %S'")
+
+    if setup:
+        lines.append(setup)
+
+    unrolled_body = "; ".join([loop_body] * LOOP_UNROLL)
+
+    lines.append("for ((brush_sample = 0; brush_sample < ${SAMPLES}; brush_sample++)); do")
+    if use_epochrealtime:
+        lines.append('    s=$$EPOCHREALTIME')
+        lines.append("    for ((i = 0; i < ${OUTER}; i++)); do")
+        lines.append(f"        {unrolled_body}")
+        lines.append("    done")
+        lines.append('    e=$$EPOCHREALTIME')
+        lines.append("    printf 'BRUSH_T %s %s\\n' \"$$s\" \"$$e\"")
+    else:
+        lines.append("    time for ((i = 0; i < ${OUTER}; i++)); do")
+        lines.append(f"        {unrolled_body}")
+        lines.append("    done")
+        lines.append(f"    echo {SAMPLE_END_MARKER} >&2")
+    lines.append("done")
+
+    if cleanup:
+        lines.append(cleanup)
+
+    lines.append(f"echo {SCRIPT_END_STDERR_MARKER} >&2")
+    lines.append(f"echo {SCRIPT_END_STDOUT_MARKER}")
+
+    return string.Template("\n".join(lines) + "\n")
+
+
+def generate_benchmark_script(
+    case: BenchmarkCase,
+    iterations: int,
+    use_epochrealtime: bool = True,
+    samples: int = 1,
+) -> str:
+    # The per-case script text is fixed apart from the iteration and sample
+    # counts, so build a string.Template once per (case, timing mode) and
+    # only substitute the counts on each call.
+    templates = getattr(case, "_script_templates", None)
+    if templates is None:
+        templates = {}
+        case._script_templates = templates
+
+    # The shell runs iterations // LOOP_UNROLL loop passes, each executing
+    # LOOP_UNROLL unrolled copies of the body.
+    outer = max(1, iterations // LOOP_UNROLL)
+
+    # Memoize the substituted script too: calibration and comparison runs
+    # ask for the same (mode, iterations, samples) combination once per
+    # shell, so the second shell reuses the first shell's script verbatim.
+    key = (use_epochrealtime, outer, samples)
+    script = templates.get(key)
+    if script is None:
+        template = templates.get(use_epochrealtime)
+        if template is None:
+            template = _build_script_template(case, use_epochrealtime)
+            templates[use_epochrealtime] = template
+        script = template.substitute(OUTER=str(outer), SAMPLES=str(samples))
+        templates[key] = script
+    return script
+
+
+def parse_time_output(stderr: str) -> TimingResult:
+    # TIMEFORMAT='%R %U %S' puts the three values on the last line as plain
+    # seconds; one split and three float conversions recover them.
+    try:
+        real, user, sys_ = map(float, stderr.strip().splitlines()[-1].split())
+    except (IndexError, ValueError) as ex:
+        raise RuntimeError(f"couldn't parse time output: {stderr!r}") from ex
+
+    return TimingResult(real_seconds=real, user_seconds=user, sys_seconds=sys_)
+
+
+CALIBRATION_CACHE_PATH = os.path.expanduser("~/.cache/brush-bench/calib.json")
+
+_calibration_cache: Optional[Dict[str, float]] = None
+
+
+def _calibration_cache_key(shell_path: str, case_name: str, case: BenchmarkCase) -> str:
+    body_hash = hashlib.sha1(
+        f"{case.setup or ''}\n{case.loop_body}".encode("utf-8")
+    ).hexdigest()[:16]
+
+    # Keying on the binary's mtime invalidates cached counts whenever the
+    # shell is rebuilt -- essential for a brush binary under development.
+    try:
+        shell_mtime = int(os.path.getmtime(shell_path))
+    except OSError:
+        shell_mtime = 0
+
+    return f"{shell_path}@{shell_mtime}|{case_name}|{body_hash}"
+
+
+def _load_calibration_cache() -> Dict[str, float]:
+    global _calibration_cache
+    if _calibration_cache is None:
+        try:
+            with open(CALIBRATION_CACHE_PATH, "r") as file:
+                import json
+
+                _calibration_cache = json.load(file)
+        except (OSError, ValueError):
+            _calibration_cache = {}
+    return _calibration_cache
+
+
+def _save_calibration_cache():
+    if _calibration_cache is None:
+        return
+
+    try:
+        os.makedirs(os.path.dirname(CALIBRATION_CACHE_PATH), exist_ok=True)
+        with open(CALIBRATION_CACHE_PATH, "w") as file:
+            import json
+
+            json.dump(_calibration_cache, file)
+    except OSError:
+        # The cache is purely an optimization; ignore filesystem failures.
+        pass
+
+
+def parse_epochrealtime_output(stdout: str) -> List[TimingResult]:
+    timings = []
+
+    for line in stdout.splitlines():
+        _, found, rest = line.partition("BRUSH_T ")
+        if not found:
+            continue
+
+        start_str, _, end_str = rest.strip().partition(" ")
+        real_seconds = float(end_str) - float(start_str)
+        timings.append(
+            TimingResult(real_seconds=real_seconds, user_seconds=0.0, sys_seconds=0.0)
+        )
+
+    if not timings:
+        raise RuntimeError(f"couldn't parse timing output: {stdout!r}")
+
+    return timings
+
+
+def run_benchmark_phase(
+    session: ShellSession, case: BenchmarkCase, iterations: int, samples: int = 1
+) -> List[TimingResult]:
+    script = generate_benchmark_script(
+        case,
+        iterations,
+        use_epochrealtime=session.supports_epochrealtime,
+        samples=samples,
+    )
+    # One timing line per sample on stdout; the fallback path emits up to
+    # four stderr lines per sample (three time fields plus a marker).
+    stdout, stderr = session.run_script(
+        script,
+        max_stdout_lines=samples + 16,
+        max_stderr_lines=4 * samples + 16,
+    )
+
+    if session.supports_epochrealtime:
+        return parse_epochrealtime_output(stdout)
+
+    return [
+        parse_time_output(chunk)
+        for chunk in stderr.split(SAMPLE_END_MARKER)
+        if chunk.strip()
+    ]
+
+
+class OnlineStats:
+    """Welford-style streaming accumulator: mean/stddev/min/max without
+    retaining the samples themselves."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def stddev(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (self.count - 1))
+
+
+def _warm_session(session: ShellSession, case: BenchmarkCase, shell_path: str):
+    # Warm up so the first measured sample isn't a cold-start outlier. OS
+    # page cache and branch-predictor state survive across cases, so the
+    # full warmup only needs to happen once per shell per process; later
+    # cases just need a short warm of the shell's own parser/AST state for
+    # the new loop body.
+    if shell_path in _WARMED_SHELLS:
+        warmup_duration = WARMUP_DURATION_SECONDS * 0.2
+    else:
+        warmup_duration = WARMUP_DURATION_SECONDS
+        _WARMED_SHELLS.add(shell_path)
+
+    warmed_seconds = 0.0
+    while warmed_seconds < warmup_duration:
+        (warmup_timing,) = run_benchmark_phase(
+            session, case, CALIBRATION_MIN_ITERATIONS
+        )
+        warmed_seconds += max(warmup_timing.real_seconds, 0.001)
+
+
+# When set (via --no-calibration), trust cached calibration results and
+# skip probe phases on cache hits.
+_SKIP_CALIBRATION = False
+
+# Maps shell path -> fixed per-sample timing overhead (seconds): the cost
+# of capturing the two $EPOCHREALTIME stamps around an empty region.
+_TIMING_OVERHEAD: Dict[str, float] = {}
+
+_OVERHEAD_PROBE_COUNT = 50
+
+
+def _measure_timing_overhead(session: ShellSession) -> float:
+    """Measures the fixed cost each sample pays for its own timestamping.
+
+    Every timed region includes two $EPOCHREALTIME reads and the variable
+    assignments around them; for heavily calibrated (long) samples this is
+    noise, but it is a constant that can simply be subtracted. Uses the
+    minimum over several empty regions, since overhead can only inflate a
+    reading. Shells on the `time` fallback skip this: the builtin's output
+    resolution is far coarser than its own overhead.
+    """
+    if session.shell_path in _TIMING_OVERHEAD:
+        return _TIMING_OVERHEAD[session.shell_path]
+
+    overhead = 0.0
+    if session.supports_epochrealtime:
+        script = (
+            f"for ((brush_ovh = 0; brush_ovh < {_OVERHEAD_PROBE_COUNT}; "
+            "brush_ovh++)); do\n"
+            "    s=$EPOCHREALTIME\n"
+            "    e=$EPOCHREALTIME\n"
+            "    printf 'BRUSH_T %s %s\\n' \"$s\" \"$e\"\n"
+            "done\n"
+            f"echo {SCRIPT_END_STDERR_MARKER} >&2\n"
+            f"echo {SCRIPT_END_STDOUT_MARKER}\n"
+        )
+        stdout, _ = session.run_script(
+            script, max_stdout_lines=_OVERHEAD_PROBE_COUNT
+        )
+        timings = parse_epochrealtime_output(stdout)
+        overhead = min(timing.real_seconds for timing in timings)
+
+    _TIMING_OVERHEAD[session.shell_path] = overhead
+    return overhead
+
+
+def _round_to_unroll(iterations: int) -> int:
+    # Generated scripts execute the body in LOOP_UNROLL-sized chunks, so
+    # every iteration count we time with has to be a multiple of it.
+    return max(LOOP_UNROLL, (iterations // LOOP_UNROLL) * LOOP_UNROLL)
+
+
+def _calibrate_iterations(
+    session: ShellSession, case: BenchmarkCase, shell_path: str, case_name: str
+) -> int:
+    # Calibrate an iteration count that makes each sample run long enough
+    # to be measurable. Seed the initial probe from the last known
+    # per-iteration cost for this (shell, case) so repeat runs -- and the
+    # reference shell on similar cases -- start near the right count.
+    cache = _load_calibration_cache()
+    cache_key = _calibration_cache_key(shell_path, case_name, case)
+    prior_per_iter = cache.get(cache_key)
+
+    calibration_iterations = CALIBRATION_MIN_ITERATIONS
+    if prior_per_iter and prior_per_iter > 0.0:
+        calibration_iterations = _round_to_unroll(
+            min(
+                CALIBRATION_MAX_ITERATIONS,
+                int(CALIBRATION_MIN_TIME_SECONDS / prior_per_iter),
+            )
+        )
+
+        # With --no-calibration, a cache hit for this exact binary (the
+        # key carries the shell's mtime) is trusted as-is; repeat runs in
+        # CI regression gating skip the probe phases entirely.
+        if _SKIP_CALIBRATION:
+            return calibration_iterations
+
+    # One probe plus an analytic scale replaces the old doubling loop
+    # (O(log) phases). If the probe lands below what the clock can reliably
+    # resolve, boost the iteration count and re-probe once before scaling.
+    min_reliable_probe = max(
+        0.001, time.get_clock_info("monotonic").resolution * 100.0
+    )
+
+    (probe_timing,) = run_benchmark_phase(session, case, calibration_iterations)
+    if probe_timing.real_seconds < min_reliable_probe:
+        boost = math.ceil(0.01 / max(probe_timing.real_seconds, 1e-9))
+        calibration_iterations = _round_to_unroll(
+            min(CALIBRATION_MAX_ITERATIONS, calibration_iterations * boost)
+        )
+        (probe_timing,) = run_benchmark_phase(session, case, calibration_iterations)
+
+    small_timing = probe_timing
+    if probe_timing.real_seconds < CALIBRATION_MIN_TIME_SECONDS:
+        calibration_iterations = _round_to_unroll(
+            min(
+                CALIBRATION_MAX_ITERATIONS,
+                math.ceil(
+                    CALIBRATION_MIN_TIME_SECONDS
+                    * calibration_iterations
+                    / max(probe_timing.real_seconds, 1e-9)
+                ),
+            )
+        )
+        (small_timing,) = run_benchmark_phase(session, case, calibration_iterations)
+
+    # Dividing one measurement by its iteration count folds fixed per-phase
+    # overhead into the per-iteration estimate. Take a second measurement at
+    # 4x the iterations and use the slope between the two points instead;
+    # the intercept (fixed cost) cancels out. If noise makes the slope
+    # non-positive, fall back to the single-point estimate.
+    if calibration_iterations * 4 <= CALIBRATION_MAX_ITERATIONS:
+        (big_timing,) = run_benchmark_phase(session, case, calibration_iterations * 4)
+        slope = (big_timing.real_seconds - small_timing.real_seconds) / (
+            3 * calibration_iterations
+        )
+        if slope > 0.0:
+            calibration_iterations = _round_to_unroll(
+                min(
+                    CALIBRATION_MAX_ITERATIONS,
+                    int(CALIBRATION_MIN_TIME_SECONDS / slope),
+                )
+            )
+
+    return calibration_iterations
+
+
+def _summarize_samples(
+    shell_path: str,
+    case_name: str,
+    case: BenchmarkCase,
+    iterations_per_sample: int,
+    sample_timings: List[TimingResult],
+    streaming: bool,
+    verbose: bool = True,
+) -> BenchmarkResult:
+    num_samples = len(sample_timings)
+
+    # Convert samples with one precomputed scale factor instead of
+    # redoing the divide-then-multiply dance per sample.
+    ns_per_iteration_scale = NS_PER_SECOND / iterations_per_sample
+
+    # Each sample's reading includes the fixed cost of its own timestamp
+    # capture; subtract the measured constant so long and short samples
+    # report the same per-iteration cost.
+    overhead_seconds = _TIMING_OVERHEAD.get(shell_path, 0.0)
+
+    if streaming:
+        # Feed samples straight into a Welford accumulator and report
+        # mean/stddev in place of median/MAD. An exact median requires
+        # retaining every sample, which is what this mode exists to
+        # avoid for very large --samples runs.
+        stats = OnlineStats()
+        progress_lines = []
+        for sample_index, timing in enumerate(sample_timings):
+            adjusted = max(0.0, timing.real_seconds - overhead_seconds)
+            per_iter_ns = adjusted * ns_per_iteration_scale
+            stats.add(per_iter_ns)
+
+            if verbose:
+                progress_lines.append(
+                    f"    sample {sample_index + 1}/{num_samples}: "
+                    f"{format_duration_ns(per_iter_ns)}/iter\n"
+                )
+
+        if progress_lines:
+            # One write for the whole batch; stderr is unbuffered line-by-
+            # line, so per-sample writes would cost a syscall apiece.
+            sys.stderr.write("".join(progress_lines))
+
+        center_ns = stats.mean
+        spread_ns = stats.stddev
+        min_ns = stats.minimum
+        max_ns = stats.maximum
+        ci = None
+    else:
+        sample_ns_values = [
+            max(0.0, timing.real_seconds - overhead_seconds)
+            * ns_per_iteration_scale
+            for timing in sample_timings
+        ]
+
+        if verbose:
+            sys.stderr.write(
+                "".join(
+                    f"    sample {sample_index + 1}/{num_samples}: "
+                    f"{format_duration_ns(per_iter_ns)}/iter\n"
+                    for sample_index, per_iter_ns in enumerate(sample_ns_values)
+                )
+            )
+
+        # One sort covers median, min, and max; statistics.median would
+        # sort again internally, and min()/max() would each rescan the
+        # list.
+        sorted_ns = sorted(sample_ns_values)
+        center_ns = _median_of_sorted(sorted_ns)
+        spread_ns = _mad_of_sorted(sorted_ns, center_ns) * MAD_NORMAL_SCALE_FACTOR
+        min_ns = sorted_ns[0]
+        max_ns = sorted_ns[-1]
+        ci = bootstrap_ci(sorted_ns)
+
+    cache = _load_calibration_cache()
+    cache[_calibration_cache_key(shell_path, case_name, case)] = (
+        center_ns / NS_PER_SECOND
+    )
+    _save_calibration_cache()
+
+    return BenchmarkResult(
+        case_name=case_name,
+        sample_count=num_samples,
+        iterations_per_sample=iterations_per_sample,
+        median_ns=center_ns,
+        mad_ns=spread_ns,
+        min_ns=min_ns,
+        max_ns=max_ns,
+        ci_low_ns=ci[0] if ci else None,
+        ci_high_ns=ci[1] if ci else None,
+    )
+
+
+def run_benchmark(
+    shell_path: str,
+    case_name: str,
+    case: BenchmarkCase,
+    num_samples: int,
+    streaming: bool = False,
+    session: Optional[ShellSession] = None,
+    verbose: bool = True,
+    iterations: Optional[int] = None,
+) -> BenchmarkResult:
+    # A caller may pass in a session to share one shell process across
+    # cases; otherwise the benchmark owns (and tears down) its own.
+    owns_session = session is None
+    if session is None:
+        session = ShellSession(shell_path)
+
+    try:
+        _warm_session(session, case, shell_path)
+        _measure_timing_overhead(session)
+
+        # Comparison mode calibrates once (on the reference shell) and
+        # passes the count in here for the other shell, so both sides run
+        # identical scripts and the second calibration phase is skipped.
+        if iterations is not None:
+            iterations_per_sample = iterations
+        else:
+            iterations_per_sample = _calibrate_iterations(
+                session, case, shell_path, case_name
+            )
+
+        # Collect all samples from one batched script, so the shell only
+        # parses the loop body once and no per-sample round trip is paid.
+        sample_timings = run_benchmark_phase(
+            session, case, iterations_per_sample, samples=num_samples
+        )
+
+        return _summarize_samples(
+            shell_path, case_name, case, iterations_per_sample, sample_timings,
+            streaming, verbose=verbose,
+        )
+    finally:
+        if owns_session:
+            session.close()
+
+
+def run_interleaved(
+    case_names: List[str],
+    test_shell_path: str,
+    ref_shell_path: Optional[str],
+    num_samples: int,
+    streaming: bool = False,
+) -> List[Tuple[BenchmarkResult, Optional[BenchmarkResult]]]:
+    """Collect samples in sample-major order: one sample for every
+    (case, shell) pair per round, rather than all samples for one pair
+    before moving on.
+
+    CPU frequency and thermal state drift over tens of seconds; running the
+    pairs in lockstep spreads that drift evenly across them instead of
+    biasing whichever pair happened to run last.
+    """
+    shells = [test_shell_path]
+    if ref_shell_path and ref_shell_path != test_shell_path:
+        shells.append(ref_shell_path)
+
+    sessions: Dict[Tuple[str, str], ShellSession] = {}
+    iterations: Dict[Tuple[str, str], int] = {}
+    timings: Dict[Tuple[str, str], List[TimingResult]] = {}
+
+    try:
+        # Phase 1: warm up and calibrate every (case, shell) pair.
+        for case_name in case_names:
+            case = BENCHMARK_CASES[case_name]
+            for shell_path in shells:
+                sys.stderr.write(f"calibrating {case_name} ({shell_path})...\n")
+
+                session = ShellSession(shell_path)
+                sessions[(case_name, shell_path)] = session
+
+                _warm_session(session, case, shell_path)
+                _measure_timing_overhead(session)
+                iterations[(case_name, shell_path)] = _calibrate_iterations(
+                    session, case, shell_path, case_name
+                )
+                timings[(case_name, shell_path)] = []
+
+        # Phase 2: round-robin a single sample per pair per round.
+        for sample_round in range(num_samples):
+            sys.stderr.write(f"sample round {sample_round + 1}/{num_samples}...\n")
+            for (case_name, shell_path), session in sessions.items():
+                (timing,) = run_benchmark_phase(
+                    session,
+                    BENCHMARK_CASES[case_name],
+                    iterations[(case_name, shell_path)],
+                )
+                timings[(case_name, shell_path)].append(timing)
+    finally:
+        for session in sessions.values():
+            session.close()
+
+    results = []
+    for case_name in case_names:
+        case = BENCHMARK_CASES[case_name]
+
+        test_result = _summarize_samples(
+            test_shell_path,
+            case_name,
+            case,
+            iterations[(case_name, test_shell_path)],
+            timings[(case_name, test_shell_path)],
+            streaming,
+            verbose=False,
+        )
+
+        ref_result = None
+        if ref_shell_path:
+            ref_result = _summarize_samples(
+                ref_shell_path,
+                case_name,
+                case,
+                iterations[(case_name, ref_shell_path)],
+                timings[(case_name, ref_shell_path)],
+                streaming,
+                verbose=False,
+            )
+
+        results.append((test_result, ref_result))
+
+    return results
+
+
+def _median_of_sorted(sorted_values: List[float]) -> float:
+    count = len(sorted_values)
+    mid = count // 2
+    if count % 2 == 1:
+        return sorted_values[mid]
+    return (sorted_values[mid - 1] + sorted_values[mid]) / 2.0
+
+
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_CONFIDENCE = 0.95
+
+
+def bootstrap_ci(
+    samples: List[float],
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = BOOTSTRAP_CONFIDENCE,
+) -> Optional[Tuple[float, float]]:
+    """Percentile bootstrap CI for the median: resample with replacement,
+    take each resample's median, and read the interval off the sorted
+    medians. Makes no distributional assumptions, unlike a stddev-based
+    interval, which benchmark samples (skewed, outlier-prone) routinely
+    violate."""
+    count = len(samples)
+    if count < 2:
+        return None
+
+    medians = sorted(
+        _median_of_sorted(sorted(random.choices(samples, k=count)))
+        for _ in range(resamples)
+    )
+
+    alpha = (1.0 - confidence) / 2.0
+    low = medians[int(alpha * resamples)]
+    high = medians[min(resamples - 1, int((1.0 - alpha) * resamples))]
+    return low, high
+
+
+def _mad_of_sorted(sorted_values: List[float], median: float) -> float:
+    # Around the median, deviations form two already-sorted runs: walking
+    # left from the median they increase, and walking right they increase.
+    # Merging those two runs with a pair of cursors finds the median
+    # deviation in O(n) without materializing and sorting a deviations list.
+    count = len(sorted_values)
+    split = bisect.bisect_left(sorted_values, median)
+    left = split - 1
+    right = split
+
+    def next_deviation() -> float:
+        nonlocal left, right
+        left_dev = median - sorted_values[left] if left >= 0 else math.inf
+        right_dev = sorted_values[right] - median if right < count else math.inf
+        if left_dev <= right_dev:
+            left -= 1
+            return left_dev
+        right += 1
+        return right_dev
+
+    for _ in range((count - 1) // 2):
+        next_deviation()
+
+    if count % 2 == 1:
+        return next_deviation()
+    return (next_deviation() + next_deviation()) / 2.0
+
+
+# (threshold, scale, unit) rows ordered largest-first; the last row always
+# matches.
+_DURATION_THRESHOLDS = (1_000, 1_000_000, NS_PER_SECOND)
+_DURATION_UNITS = (
+    (1.0, "ns"),
+    (1.0 / 1_000, "µs"),
+    (1.0 / 1_000_000, "ms"),
+    (1.0 / NS_PER_SECOND, "s"),
+)
+
+
+def format_duration_ns(ns: float) -> str:
+    # bisect indexes straight into the unit table instead of walking a
+    # branch chain; ns values below 1 µs (the common case for fast bodies)
+    # and above 1 s both resolve in the same constant number of steps.
+    scale, unit = _DURATION_UNITS[bisect.bisect_right(_DURATION_THRESHOLDS, ns)]
+    return f"{ns * scale:.3f} {unit}"
+
+
+def format_change(change: float) -> str:
+    if change == 1.0:
+        return "no change"
+
+    # change is reference/test; (change - 1) / change is the percentage
+    # delta, computed with one division instead of two.
+    pct_change = ((change - 1.0) / change) * -100.0
+
+    if change > 1.0:
+        return f"{change:.2f}x faster ({pct_change:+.1f}%)"
+    return f"{change:.2f}x slower ({pct_change:+.1f}%)"
+
+
+def compute_geometric_mean_change(changes: List[float]) -> Optional[float]:
+    valid_changes = [change for change in changes if change > 0.0]
+    if not valid_changes:
+        return None
+
+    logs = [math.log(change) for change in valid_changes]
+    return math.exp(math.fsum(logs) / len(logs))
+
+
+def print_human_results(
+    results: List[Tuple[BenchmarkResult, Optional[BenchmarkResult]]],
+):
+    changes = []
+
+    def variance_suffix(result: BenchmarkResult) -> str:
+        if result.ci_low_ns is not None and result.ci_high_ns is not None:
+            return (
+                f"(95% CI [{format_duration_ns(result.ci_low_ns)}, "
+                f"{format_duration_ns(result.ci_high_ns)}])"
+            )
+        return f"(± {format_duration_ns(result.mad_ns)})"
+
+    for test_result, ref_result in results:
+        print(f"{test_result.case_name}:")
+        print(
+            f"    test:      {format_duration_ns(test_result.median_ns)}/iter "
+            f"{variance_suffix(test_result)}"
+        )
+
+        if ref_result:
+            print(
+                f"    reference: {format_duration_ns(ref_result.median_ns)}/iter "
+                f"{variance_suffix(ref_result)}"
+            )
+
+            change = ref_result.median_ns / test_result.median_ns
+            changes.append(change)
+            print(f"    change:    {format_change(change)}")
+
+    geo_mean = compute_geometric_mean_change(changes)
+    if geo_mean is not None:
+        print(f"summary: {format_change(geo_mean)} (geometric mean)")
+
+
+def _result_to_json(result: BenchmarkResult) -> dict:
+    # asdict's C-level field walk replaces a hand-maintained literal that
+    # had to be kept in sync with BenchmarkResult.
+    entry = dataclasses.asdict(result)
+    del entry["case_name"]
+    entry["samples"] = entry.pop("sample_count")
+    return entry
+
+
+def print_json_results(
+    results: List[Tuple[BenchmarkResult, Optional[BenchmarkResult]]],
+):
+    document = {
+        test_result.case_name: {
+            "test": _result_to_json(test_result),
+            "reference": _result_to_json(ref_result) if ref_result else None,
+        }
+        for test_result, ref_result in results
+    }
+
+    import json
+
+    json.dump(document, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+def _run_one(
+    case_name: str,
+    case: BenchmarkCase,
+    test_shell_path: str,
+    ref_shell_path: Optional[str],
+    num_samples: int,
+    core_id: Optional[int] = None,
+    streaming: bool = False,
+    shared_sessions: Optional[Dict[str, ShellSession]] = None,
+    verbose: bool = True,
+) -> Tuple[BenchmarkResult, Optional[BenchmarkResult]]:
+    # When running in a pool, pin this worker (and the shells it spawns) to
+    # a dedicated core so concurrent cases don't thrash each other.
+    if core_id is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core_id})
+
+    def session_for(shell_path: str) -> Optional[ShellSession]:
+        if shared_sessions is None:
+            return None
+        if shell_path not in shared_sessions:
+            shared_sessions[shell_path] = ShellSession(shell_path)
+        return shared_sessions[shell_path]
+
+    # Run the reference shell first so its calibrated iteration count can
+    # be reused for the shell under test; both shells then execute exactly
+    # the same scripts and only one calibration phase is paid.
+    ref_result = None
+    if ref_shell_path:
+        sys.stderr.write(f"benchmarking {case_name} ({ref_shell_path})...\n")
+        ref_result = run_benchmark(
+            ref_shell_path,
+            case_name,
+            case,
+            num_samples,
+            streaming=streaming,
+            session=session_for(ref_shell_path),
+            verbose=verbose,
+        )
+
+    sys.stderr.write(f"benchmarking {case_name} ({test_shell_path})...\n")
+    test_result = run_benchmark(
+        test_shell_path,
+        case_name,
+        case,
+        num_samples,
+        streaming=streaming,
+        session=session_for(test_shell_path),
+        verbose=verbose,
+        iterations=ref_result.iterations_per_sample if ref_result else None,
+    )
+
+    return test_result, ref_result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark brush against a reference shell."
+    )
+    parser.add_argument(
+        "--test-shell",
+        dest="test_shell",
+        type=str,
+        default="target/release/brush",
+        help="Path to the shell under test",
+    )
+    parser.add_argument(
+        "--reference-shell",
+        dest="reference_shell",
+        type=str,
+        default="bash",
+        help="Reference shell to compare against (or 'none' to skip)",
+    )
+    parser.add_argument(
+        "--samples",
+        dest="samples",
+        type=int,
+        default=DEFAULT_SAMPLE_COUNT,
+        help="Number of samples to collect per case",
+    )
+    parser.add_argument(
+        "--cases",
+        dest="cases",
+        type=str,
+        nargs="*",
+        help="Names of benchmark cases to run (default: all)",
+    )
+    parser.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Number of benchmark cases to run in parallel (results may be "
+        "noisier with more than 1)",
+    )
+    parser.add_argument(
+        "--interleave",
+        dest="interleave",
+        action="store_true",
+        help="Collect samples in round-robin order across all (case, shell) "
+        "pairs to spread thermal/frequency drift evenly (sequential runs "
+        "only)",
+    )
+    parser.add_argument(
+        "--streaming",
+        dest="streaming",
+        action="store_true",
+        help="Stream samples through online mean/stddev stats instead of "
+        "retaining them for median/MAD (useful with very large --samples)",
+    )
+    parser.add_argument(
+        "--no-calibration",
+        dest="no_calibration",
+        action="store_true",
+        help="Trust cached calibration results (keyed by shell binary "
+        "mtime) and skip the probe phase on cache hits; useful for "
+        "repeated CI runs against the same binary",
+    )
+    parser.add_argument(
+        "--pin-cpu",
+        dest="pin_cpu",
+        type=int,
+        default=None,
+        metavar="CPU",
+        help="Pin the harness and its shells to the given CPU to reduce "
+        "scheduler-migration jitter (Linux only; avoid CPU 0, where IRQs "
+        "tend to land)",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json_output",
+        action="store_true",
+        help="Emit results as JSON on stdout",
+    )
+
+    args = parser.parse_args()
+
+    if args.no_calibration:
+        global _SKIP_CALIBRATION
+        _SKIP_CALIBRATION = True
+
+    if args.pin_cpu is not None:
+        if not hasattr(os, "sched_setaffinity"):
+            sys.stderr.write("error: --pin-cpu isn't supported on this platform\n")
+            sys.exit(1)
+        # Affinity is inherited across fork/exec, so pinning the harness
+        # itself pins every shell session it spawns without needing a
+        # preexec_fn (which would force Popen off the posix_spawn path).
+        try:
+            os.sched_setaffinity(0, {args.pin_cpu})
+        except OSError:
+            sys.stderr.write(f"error: couldn't pin to CPU {args.pin_cpu}\n")
+            sys.exit(1)
+
+    case_names = args.cases or list(BENCHMARK_CASES.keys())
+    for case_name in case_names:
+        if case_name not in BENCHMARK_CASES:
+            sys.stderr.write(f"error: unknown benchmark case: {case_name}\n")
+            sys.exit(1)
+
+    test_shell_path = resolve_shell_path(args.test_shell)
+    ref_shell_path = (
+        resolve_shell_path(args.reference_shell)
+        if args.reference_shell != "none"
+        else None
+    )
+
+    # A shell that dies mid-script (e.g. one that can't parse the
+    # generated bash-isms) surfaces as a RuntimeError from its session;
+    # report it like every other invalid input rather than tracebacking.
+    try:
+        if args.interleave and args.jobs == 1:
+            results = run_interleaved(
+                case_names,
+                test_shell_path,
+                ref_shell_path,
+                args.samples,
+                streaming=args.streaming,
+            )
+        elif args.jobs > 1:
+            cpu_count = os.cpu_count() or 1
+            with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                futures = [
+                    executor.submit(
+                        _run_one,
+                        case_name,
+                        BENCHMARK_CASES[case_name],
+                        test_shell_path,
+                        ref_shell_path,
+                        args.samples,
+                        index % cpu_count,
+                        args.streaming,
+                        # Suppress per-sample progress in workers; interleaved
+                        # lines from concurrent cases are unreadable anyway.
+                        verbose=False,
+                    )
+                    for index, case_name in enumerate(case_names)
+                ]
+                results = [future.result() for future in futures]
+        else:
+            # Sequential runs share one long-lived shell per shell path across
+            # every case whose script leaves the shell clean: setup-free cases
+            # trivially qualify, and cases with setup qualify when they declare
+            # a cleanup that undoes it. That amortizes shell startup across all
+            # cases instead of paying it once per (case, shell) pair. Cases
+            # with setup but no cleanup still get a fresh shell.
+            shared_sessions: Dict[str, ShellSession] = {}
+
+            def _leaves_shell_clean(case: BenchmarkCase) -> bool:
+                return case.setup is None or case.cleanup is not None
+
+            results = []
+            try:
+                for case_name in case_names:
+                    case = BENCHMARK_CASES[case_name]
+                    results.append(
+                        _run_one(
+                            case_name,
+                            case,
+                            test_shell_path,
+                            ref_shell_path,
+                            args.samples,
+                            streaming=args.streaming,
+                            shared_sessions=(
+                                shared_sessions if _leaves_shell_clean(case) else None
+                            ),
+                        )
+                    )
+            finally:
+                for session in shared_sessions.values():
+                    session.close()
+
+    except RuntimeError as e:
+        sys.stderr.write(f"error: {e}; is it bash-compatible?\n")
+        sys.exit(1)
+
+    if args.json_output:
+        print_json_results(results)
+    else:
+        print_human_results(results)
+
+
+if __name__ == "__main__":
+    main()
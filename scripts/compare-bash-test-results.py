@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""Compares JSON test reports produced by run-bash-tests.py."""
+import argparse
+import concurrent.futures
+import functools
+import json
+import sys
+from typing import Dict, List
+
+
+@functools.lru_cache(maxsize=None)
+def load_results(file_path: str) -> dict:
+    # Memoized: `summary` invocations may name the same report several
+    # times, and comparisons against one baseline reuse its parse.
+    with open(file_path, "r") as file:
+        return json.load(file)
+
+
+def test_statuses(results: dict) -> Dict[str, str]:
+    return {test["name"]: test["status"] for test in results["tests"]}
+
+
+def print_comparison(baseline: dict, current: dict):
+    baseline_tests = test_statuses(baseline)
+    current_tests = test_statuses(current)
+
+    # Removals fall out of set algebra on the dict views; everything else
+    # is classified in a single pass over the current run, with the list
+    # appends bound to locals to keep per-name dispatch to one branch and
+    # one attribute-free call.
+    removed = sorted(baseline_tests.keys() - current_tests.keys())
+
+    new_passing: List[str] = []
+    new_failing: List[str] = []
+    fixed: List[str] = []
+    regressed: List[str] = []
+
+    append_new_passing = new_passing.append
+    append_new_failing = new_failing.append
+    append_fixed = fixed.append
+    append_regressed = regressed.append
+    baseline_status_of = baseline_tests.get
+
+    for name, status in current_tests.items():
+        baseline_status = baseline_status_of(name)
+        if baseline_status == status:
+            continue
+        if baseline_status is None:
+            if status == "pass":
+                append_new_passing(name)
+            else:
+                append_new_failing(name)
+        elif status == "pass":
+            append_fixed(name)
+        elif baseline_status == "pass":
+            append_regressed(name)
+
+    # Build the whole report and write it once; per-line prints cost a
+    # write() syscall apiece on line-buffered stdout.
+    lines = [
+        f"{len(current_tests)} tests in current run; "
+        f"{len(baseline_tests)} in baseline"
+    ]
+
+    for title, names in (
+        ("Regressed", regressed),
+        ("Fixed", fixed),
+        ("New (passing)", new_passing),
+        ("New (failing)", new_failing),
+        ("Removed", removed),
+    ):
+        if names:
+            lines.append(f"{title}:")
+            lines.extend(f"  - {name}" for name in sorted(names))
+
+    sys.stdout.write("\n".join(lines) + "\n")
+
+    if regressed or new_failing:
+        sys.exit(1)
+
+
+def print_summary_table(results_by_path: Dict[str, dict]):
+    lines = [
+        "| Results file | Total | Passed | Failed | Timed out | Errored |",
+        "| ------------ | ----- | ------ | ------ | --------- | ------- |",
+    ]
+
+    for path, results in results_by_path.items():
+        lines.append(
+            f"| {path} "
+            f"| {len(results['tests'])} "
+            f"| {results['passed_count']} "
+            f"| {results['failed_count']} "
+            f"| {results['timeout_count']} "
+            f"| {results['error_count']} |"
+        )
+
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare or summarize run-bash-tests.py JSON reports."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare a current report against a baseline"
+    )
+    compare_parser.add_argument("baseline", help="Path to the baseline report")
+    compare_parser.add_argument("current", help="Path to the current report")
+
+    summary_parser = subparsers.add_parser(
+        "summary", help="Summarize one or more reports as a markdown table"
+    )
+    summary_parser.add_argument(
+        "results", nargs="+", help="Paths to report files"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        print_comparison(load_results(args.baseline), load_results(args.current))
+    else:
+        # Loading is I/O-bound and independent per file, so overlap the
+        # reads; wall time drops to roughly the slowest single file.
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(8, len(args.results))
+        ) as executor:
+            loaded = executor.map(load_results, args.results)
+            results_by_path = dict(zip(args.results, loaded))
+        print_summary_table(results_by_path)
+
+
+if __name__ == "__main__":
+    main()
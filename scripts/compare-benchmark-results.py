@@ -2,6 +2,7 @@
 import argparse
 import datetime
 import re
+import sys
 from dataclasses import dataclass
 from typing import Dict
 
@@ -17,22 +18,26 @@ class Benchmark:
     duration_in_ns: int
     deviation_in_ns: int
 
-def parse_benchmarks_results(file_path: str) -> Dict[str, Benchmark]:
-    benchmarks = {}
+# One compiled multiline pattern scans the whole results file in a single
+# C-level pass instead of a readlines() list plus a re.match per line.
+BENCHMARK_RESULT_RE = re.compile(
+    r"^\s*test (.*) \.\.\. bench: +(\d+) ns/iter \(\+/- (\d+)\)\s*$",
+    re.MULTILINE,
+)
 
-    with open(file_path, "r") as file:
-        for line in file.readlines():
-            match = re.match(r"test (.*) \.\.\. bench: +(\d+) ns/iter \(\+/- (\d+)\)", line.strip())
-            if match:
-                benchmark = Benchmark(
-                    test_name=match.group(1),
-                    duration_in_ns=int(match.group(2)),
-                    deviation_in_ns=int(match.group(3))
-                )
 
-                benchmarks[benchmark.test_name] = benchmark
+def parse_benchmarks_results(file_path: str) -> Dict[str, Benchmark]:
+    with open(file_path, "r") as file:
+        contents = file.read()
 
-    return benchmarks
+    return {
+        match.group(1): Benchmark(
+            test_name=match.group(1),
+            duration_in_ns=int(match.group(2)),
+            deviation_in_ns=int(match.group(3)),
+        )
+        for match in BENCHMARK_RESULT_RE.finditer(contents)
+    }
 
 base_results = parse_benchmarks_results(args.base_results_file_path)
 test_results = parse_benchmarks_results(args.test_results_file_path)
@@ -44,37 +49,53 @@ removed_from_base = base_test_names - test_test_names
 added_by_test = test_test_names - base_test_names
 common = base_test_names & test_test_names
 
-print("# Performance Benchmark Report")
+# Indexed by (delta > 0) + 2 * (delta == 0): improvement, regression,
+# exactly unchanged.
+DELTA_PREFIXES = ("🟢 ", "🟠 +", "⚪  ")
+
+# Accumulate the whole report and write it in one go rather than paying a
+# write() syscall per row on line-buffered stdout.
+report_lines = ["# Performance Benchmark Report"]
 
 if common:
-    print(f"| {'Benchmark name':36} | {'Baseline (ns)':>13} | {'Test/PR (ns)':>13} | {'Delta (ns)':>13} | {'Delta %'} |")
-    print(f"| {'-' * 36} | {'-' * 13} | {'-' * 13} | {'-' * 13} | {'-' * 7}")
+    report_lines.append(f"| {'Benchmark name':36} | {'Baseline (ns)':>13} | {'Test/PR (ns)':>13} | {'Delta (ns)':>13} | {'Delta %'} |")
+    report_lines.append(f"| {'-' * 36} | {'-' * 13} | {'-' * 13} | {'-' * 13} | {'-' * 7}")
     for name in sorted(common):
-        base_duration = base_results[name].duration_in_ns
-        test_duration = test_results[name].duration_in_ns
+        base = base_results[name]
+        test = test_results[name]
+        base_duration = base.duration_in_ns
+        test_duration = test.duration_in_ns
 
         delta_duration = test_duration - base_duration
         delta_str = str(delta_duration)
         if delta_duration > 0:
             delta_str = "+" + delta_str
 
-        delta_percentage = (100.0 * delta_duration) / base_duration
-        delta_percentage_str = f"{delta_percentage:.2f}%"
-        if delta_percentage < 0:
-            delta_percentage_str = "🟢 " + delta_percentage_str
-        elif delta_percentage > 0:
-            delta_percentage_str = "🟠 +" + delta_percentage_str
+        # One division serves the delta and both tolerance percentages.
+        inv_base_pct = 100.0 / base_duration
+        delta_percentage = delta_duration * inv_base_pct
+        noise_percentage = (
+            max(base.deviation_in_ns, test.deviation_in_ns) * inv_base_pct
+        )
+
+        # A delta inside either run's own +/- band is indistinguishable
+        # from noise; say so instead of coloring it.
+        if delta_duration != 0 and abs(delta_percentage) <= noise_percentage:
+            delta_percentage_str = "⚪  ~{:.2f}%".format(delta_percentage)
         else:
-            delta_percentage_str = "⚪  " + delta_percentage_str
+            prefix = DELTA_PREFIXES[
+                (delta_percentage > 0) + 2 * (delta_percentage == 0)
+            ]
+            delta_percentage_str = f"{prefix}{delta_percentage:.2f}%"
 
-        print(f"| `{name:36}` | `{base_duration:10} ns` | `{test_duration:10} ns` | `{delta_str:>10} ns` | `{delta_percentage_str:>7}` |")
+        report_lines.append(f"| `{name:36}` | `{base_duration:10} ns` | `{test_duration:10} ns` | `{delta_str:>10} ns` | `{delta_percentage_str:>7}` |")
 
 if removed_from_base:
-    print("Benchmarks removed:")
-    for name in removed_from_base:
-        print(f"  - {name}")
+    report_lines.append("Benchmarks removed:")
+    report_lines.extend(f"  - {name}" for name in removed_from_base)
 
 if added_by_test:
-    print("Benchmarks added:")
-    for name in added_by_test:
-        print(f"  - {name}")
+    report_lines.append("Benchmarks added:")
+    report_lines.extend(f"  - {name}" for name in added_by_test)
+
+sys.stdout.write("\n".join(report_lines) + "\n")
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Formats `cargo public-api diff` output as a markdown report."""
+import argparse
+import sys
+from typing import List, Optional
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-d", "--diff", dest="diff_file_path", type=str, help="Path to cargo public-api diff output", required=True)
+parser.add_argument("--title", dest="title", type=str, default="Public API changes", help="Title to display for the report")
+
+args = parser.parse_args()
+
+removed_lines: List[str] = []
+changed_lines: List[str] = []
+added_lines: List[str] = []
+
+# Section headers route through one dict lookup per line instead of a
+# chain of substring checks, and the file is iterated directly rather
+# than materialized with readlines().
+section_map = {
+    "Removed items from the public API": removed_lines,
+    "Changed items in the public API": changed_lines,
+    "Added items to the public API": added_lines,
+}
+
+current_section: Optional[List[str]] = None
+
+with open(args.diff_file_path, "r") as diff_file:
+    for line in diff_file:
+        line = line.strip()
+
+        if not line or line == "(none)" or line.startswith("===="):
+            continue
+
+        target = section_map.get(line)
+        if target is not None:
+            current_section = target
+            continue
+
+        if current_section is not None:
+            current_section.append(line)
+
+report_lines = [f"## {args.title}"]
+
+if not (removed_lines or changed_lines or added_lines):
+    report_lines.append("No public API changes detected.")
+else:
+    for heading, lines in (
+        ("Removed", removed_lines),
+        ("Changed", changed_lines),
+        ("Added", added_lines),
+    ):
+        if lines:
+            report_lines.append(f"### {heading}")
+            report_lines.append("```rust")
+            report_lines.extend(lines)
+            report_lines.append("```")
+
+sys.stdout.write("\n".join(report_lines) + "\n")
@@ -0,0 +1,734 @@
+#!/usr/bin/python3
+"""Runs tests from bash's own test suite against a brush binary.
+
+Each test is a `<name>.tests` script whose output is compared against the
+matching `<name>.right` oracle file, mirroring how bash's `run-all` driver
+works. Point --tests-dir at a checkout of bash's `tests/` directory.
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from difflib import unified_diff
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import os
+
+DEFAULT_TIMEOUT_SECONDS = 120
+
+# Matches member test names inside a run-<suite> driver script.
+_SUITE_TEST_RE = re.compile(r"(\w[\w-]*)\.tests\b")
+
+# Cap on unified-diff lines kept per failing test.
+_MAX_DIFF_LINES = 200
+
+# Persisted per-test duration estimates, used to schedule long tests first
+# in parallel runs. Updated as an exponentially weighted moving average so
+# one noisy run doesn't dominate.
+DURATIONS_CACHE_PATH = os.path.expanduser("~/.cache/brush/test-durations.json")
+_DURATION_EWMA_ALPHA = 0.3
+
+# Minimum interval between progress-line redraws. Fast suites can finish
+# hundreds of tests per second; redrawing on every completion turns into a
+# write() storm that visibly slows the run.
+_PROGRESS_REDRAW_INTERVAL_SECONDS = 0.05
+
+
+class Colors:
+    RED = "\033[31m"
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+    # Whether stderr wants color can't change mid-run; probe the tty and
+    # NO_COLOR once at import instead of per colorize() call.
+    _ENABLED = sys.stderr.isatty() and os.getenv("NO_COLOR") is None
+
+    @staticmethod
+    def enabled() -> bool:
+        return Colors._ENABLED
+
+
+def colorize(text: str, color: str) -> str:
+    if not Colors.enabled():
+        return text
+    return f"{color}{text}{Colors.RESET}"
+
+
+def bold(text: str) -> str:
+    if not Colors.enabled():
+        return text
+    return f"{Colors.BOLD}{text}{Colors.RESET}"
+
+
+@dataclass(slots=True)
+class TestResult:
+    name: str
+    status: str  # "pass", "fail", "timeout", or "error"
+    duration_seconds: float
+    output: str = ""
+    error: str = ""
+
+
+@dataclass(slots=True)
+class SuiteResult:
+    suite_name: str
+    duration_seconds: float
+    tests: List[TestResult] = field(default_factory=list)
+    passed_count: int = 0
+    failed_count: int = 0
+    timeout_count: int = 0
+    error_count: int = 0
+
+
+class BashTestRunner:
+    def __init__(
+        self,
+        shell_path: str,
+        tests_dir: Path,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        verbose: bool = False,
+    ):
+        # Bare shell names resolve through PATH; paths are absolutized so
+        # tests (which run with cwd=tests_dir) still find the binary.
+        if "/" in shell_path:
+            self.shell_path = os.path.abspath(shell_path)
+        else:
+            resolved = shutil.which(shell_path)
+            if not resolved:
+                sys.stderr.write(f"error: couldn't find shell: {shell_path}\n")
+                sys.exit(1)
+            self.shell_path = resolved
+        self.tests_dir = tests_dir
+        self.timeout = timeout
+        self.verbose = verbose
+
+        # The base environment is identical for every test; compute it once
+        # instead of copying os.environ per test.
+        self._base_env = self.get_base_env()
+
+        # One persistent scratch directory for the whole run; per-test
+        # TemporaryDirectory objects would pay mkdir + recursive rmtree for
+        # every test, which adds up on suites of short tests.
+        self._tmp_root = tempfile.mkdtemp(prefix="brush-tests-")
+        atexit.register(shutil.rmtree, self._tmp_root, ignore_errors=True)
+
+        # Directory scans and suite-script parses repeat across suites in
+        # one invocation; cache them per runner.
+        self._tests_cache: Optional[List[str]] = None
+        self._suite_tests_cache: Dict[str, List[str]] = {}
+
+        self._durations = self._load_durations()
+
+        # Colorized labels are loop-invariant; build them once instead of
+        # re-running colorize() on every progress line.
+        self._running_label = colorize("running", Colors.YELLOW)
+        self._status_labels = {
+            "pass": colorize("PASS", Colors.GREEN),
+            "fail": colorize("FAIL", Colors.RED),
+            "timeout": colorize("TIMEOUT", Colors.RED),
+            "error": colorize("ERROR", Colors.RED),
+        }
+
+    def _load_durations(self) -> Dict[str, float]:
+        try:
+            with open(DURATIONS_CACHE_PATH, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_durations(self, results: List[TestResult]):
+        for result in results:
+            prior = self._durations.get(result.name)
+            if prior is None:
+                self._durations[result.name] = result.duration_seconds
+            else:
+                self._durations[result.name] = (
+                    _DURATION_EWMA_ALPHA * result.duration_seconds
+                    + (1.0 - _DURATION_EWMA_ALPHA) * prior
+                )
+
+        try:
+            os.makedirs(os.path.dirname(DURATIONS_CACHE_PATH), exist_ok=True)
+            with open(DURATIONS_CACHE_PATH, "w") as file:
+                json.dump(self._durations, file)
+        except OSError:
+            pass
+
+    def get_base_env(self) -> Dict[str, str]:
+        env = os.environ.copy()
+
+        # bash's test scripts find the shell under test through THIS_SH.
+        env["THIS_SH"] = self.shell_path
+        env["BUILD_DIR"] = str(self.tests_dir)
+        env["LC_ALL"] = "C"
+
+        return env
+
+    def list_tests(self) -> List[str]:
+        # os.scandir beats Path.glob here: no per-entry Path objects, and
+        # DirEntry answers is_file() from data the readdir already fetched.
+        if self._tests_cache is None:
+            with os.scandir(self.tests_dir) as entries:
+                self._tests_cache = sorted(
+                    entry.name[: -len(".tests")]
+                    for entry in entries
+                    if entry.name.endswith(".tests") and entry.is_file()
+                )
+        return self._tests_cache
+
+    def get_suite_tests(self, suite_name: str) -> List[str]:
+        # Suite driver scripts (run-<name>) invoke their member tests; pull
+        # the member names out of the script text.
+        if suite_name in self._suite_tests_cache:
+            return self._suite_tests_cache[suite_name]
+
+        suite_path = self.tests_dir / f"run-{suite_name}"
+        if not suite_path.is_file():
+            sys.stderr.write(f"error: no such suite: {suite_name}\n")
+            sys.exit(1)
+
+        script = suite_path.read_text()
+        names = _SUITE_TEST_RE.findall(script)
+
+        seen = set()
+        tests = []
+        for name in names:
+            if name not in seen:
+                seen.add(name)
+                tests.append(name)
+
+        self._suite_tests_cache[suite_name] = tests
+        return tests
+
+    def run_single_test(self, test_name: str) -> TestResult:
+        test_path = self.tests_dir / f"{test_name}.tests"
+        expected_output_path = self.tests_dir / f"{test_name}.right"
+
+        if not test_path.is_file():
+            return TestResult(
+                name=test_name,
+                status="error",
+                duration_seconds=0.0,
+                error=f"missing test script: {test_path}",
+            )
+
+        start = time.monotonic()
+
+        # The thread ident keeps concurrent workers from colliding on the
+        # scratch file name.
+        test_output_path = Path(self._tmp_root) / (
+            f"{test_name}-{threading.get_ident()}.out"
+        )
+
+        env = {**self._base_env, "BASH_TSTOUT": str(test_output_path)}
+
+        try:
+            try:
+                # The .right oracles are recorded from a merged stream
+                # (`test > right 2>&1`), so capture stdout and stderr on one
+                # pipe to preserve the interleaving a test produces across
+                # both; concatenating separate captures would reorder it.
+                proc = subprocess.run(
+                    [self.shell_path, str(test_path)],
+                    cwd=self.tests_dir,
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    timeout=self.timeout,
+                )
+            except subprocess.TimeoutExpired:
+                return TestResult(
+                    name=test_name,
+                    status="timeout",
+                    duration_seconds=time.monotonic() - start,
+                    error=f"timed out after {self.timeout}s",
+                )
+            except OSError as e:
+                return TestResult(
+                    name=test_name,
+                    status="error",
+                    duration_seconds=time.monotonic() - start,
+                    error=str(e),
+                )
+
+            return self._judge_output(
+                test_name, proc.stdout, time.monotonic() - start
+            )
+        finally:
+            test_output_path.unlink(missing_ok=True)
+
+    def _judge_output(
+        self, test_name: str, actual_bytes: bytes, duration: float
+    ) -> TestResult:
+        # bash's tests write their observable output on stdout/stderr; the
+        # .right file holds the expected merged output. Compare as raw
+        # bytes: the common (passing) path then never pays for decoding,
+        # and decoding only happens when output will be shown.
+        expected_output_path = self.tests_dir / f"{test_name}.right"
+
+        if not expected_output_path.is_file():
+            return TestResult(
+                name=test_name,
+                status="error",
+                duration_seconds=duration,
+                output=actual_bytes.decode(errors="replace"),
+                error=f"missing oracle file: {expected_output_path}",
+            )
+
+        # A size mismatch proves inequality without reading or comparing
+        # the oracle's content; it only gets read below, on the failure
+        # path, where the diff needs it anyway.
+        if expected_output_path.stat().st_size == len(actual_bytes):
+            expected_bytes = expected_output_path.read_bytes()
+
+            if actual_bytes == expected_bytes:
+                return TestResult(
+                    name=test_name,
+                    status="pass",
+                    duration_seconds=duration,
+                    output=(
+                        actual_bytes.decode(errors="replace")
+                        if self.verbose
+                        else ""
+                    ),
+                )
+        else:
+            expected_bytes = expected_output_path.read_bytes()
+
+        actual_output = actual_bytes.decode(errors="replace")
+        expected_output = expected_bytes.decode(errors="replace")
+
+        # Generate the unified diff in-process; forking `diff` would
+        # cost an exec per failing test and a scratch file to feed it.
+        # Bound the diff so one badly broken test can't bloat reports.
+        diff_lines = list(
+            unified_diff(
+                expected_output.splitlines(keepends=True),
+                actual_output.splitlines(keepends=True),
+                fromfile=str(expected_output_path),
+                tofile="actual",
+            )
+        )
+        if len(diff_lines) > _MAX_DIFF_LINES:
+            omitted = len(diff_lines) - _MAX_DIFF_LINES
+            diff_lines = diff_lines[:_MAX_DIFF_LINES] + [
+                f"... ({omitted} more diff lines)\n"
+            ]
+        diff_text = "".join(diff_lines)
+
+        return TestResult(
+            name=test_name,
+            status="fail",
+            duration_seconds=duration,
+            output=actual_output,
+            error=diff_text,
+        )
+
+    def run_suite(
+        self, suite_name: str, tests: List[str], jobs: int = 1
+    ) -> SuiteResult:
+        start = time.monotonic()
+
+        if jobs > 1:
+            results = self._run_suite_parallel(tests, jobs)
+        else:
+            results = self._run_suite_sequential(tests)
+
+        self._save_durations(results)
+
+        # One pass over the results instead of one generator scan per
+        # status.
+        counts = {"pass": 0, "fail": 0, "timeout": 0, "error": 0}
+        for result in results:
+            counts[result.status] += 1
+
+        suite_result = SuiteResult(
+            suite_name=suite_name,
+            duration_seconds=time.monotonic() - start,
+            tests=results,
+            passed_count=counts["pass"],
+            failed_count=counts["fail"],
+            timeout_count=counts["timeout"],
+            error_count=counts["error"],
+        )
+
+        return suite_result
+
+    def _run_suite_sequential(self, tests: List[str]) -> List[TestResult]:
+        results = []
+        total = len(tests)
+        last_draw = 0.0
+
+        for index, test_name in enumerate(tests):
+            now = time.monotonic()
+            if now - last_draw > _PROGRESS_REDRAW_INTERVAL_SECONDS:
+                last_draw = now
+                sys.stderr.write(
+                    f"\r[{index + 1}/{total}] "
+                    f"{self._running_label} {test_name}...\033[K"
+                )
+
+            result = self.run_single_test(test_name)
+            results.append(result)
+            self._report_result(result)
+
+        sys.stderr.write("\r\033[K")
+        return results
+
+    def _run_suite_parallel(self, tests: List[str], jobs: int) -> List[TestResult]:
+        # Longest-first submission packs the workers better: with tests of
+        # mixed length, kicking off the slow ones early keeps a short
+        # straggler from holding the whole run open at the tail. Tests
+        # without a recorded duration sort first so new tests get measured
+        # eagerly.
+        submission_order = sorted(
+            tests,
+            key=lambda name: self._durations.get(name, float("inf")),
+            reverse=True,
+        )
+
+        # A single event-loop thread supervises all child processes via the
+        # OS's readiness notifications, instead of parking one worker
+        # thread per concurrent test inside wait(). A semaphore caps how
+        # many children run at once.
+        results = asyncio.run(self._run_suite_async(submission_order, jobs))
+
+        # Report in the caller's order, not submission order.
+        results_by_name = {result.name: result for result in results}
+        return [results_by_name[test_name] for test_name in tests]
+
+    async def _run_suite_async(
+        self, tests: List[str], jobs: int
+    ) -> List[TestResult]:
+        semaphore = asyncio.Semaphore(jobs)
+        results_by_name: Dict[str, TestResult] = {}
+        completed = 0
+        total = len(tests)
+        last_draw = 0.0
+
+        coros = [
+            self._run_single_test_async(semaphore, test_name)
+            for test_name in tests
+        ]
+
+        for future in asyncio.as_completed(coros):
+            result = await future
+            results_by_name[result.name] = result
+            completed += 1
+
+            now = time.monotonic()
+            if completed == total or (
+                now - last_draw > _PROGRESS_REDRAW_INTERVAL_SECONDS
+            ):
+                last_draw = now
+                sys.stderr.write(f"\r[{completed}/{total}] completed\033[K")
+            self._report_result(result)
+
+        sys.stderr.write("\r\033[K")
+        return [results_by_name[test_name] for test_name in tests]
+
+    async def _run_single_test_async(
+        self, semaphore: asyncio.Semaphore, test_name: str
+    ) -> TestResult:
+        async with semaphore:
+            test_path = self.tests_dir / f"{test_name}.tests"
+
+            if not test_path.is_file():
+                return TestResult(
+                    name=test_name,
+                    status="error",
+                    duration_seconds=0.0,
+                    error=f"missing test script: {test_path}",
+                )
+
+            start = time.monotonic()
+
+            test_output_path = Path(self._tmp_root) / f"{test_name}.out"
+            env = {**self._base_env, "BASH_TSTOUT": str(test_output_path)}
+
+            try:
+                try:
+                    # The test runs as its own session leader so that a
+                    # timeout can kill the whole group: bash's suite spawns
+                    # background children, and any survivor would keep the
+                    # pipe open (and the run wedged) after the test itself
+                    # is dead. stderr merges into stdout, matching how the
+                    # .right oracles were recorded (`test > right 2>&1`) and
+                    # preserving the interleaving across both streams.
+                    proc = await asyncio.create_subprocess_exec(
+                        self.shell_path,
+                        str(test_path),
+                        cwd=self.tests_dir,
+                        env=env,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.STDOUT,
+                        start_new_session=True,
+                    )
+                except OSError as e:
+                    return TestResult(
+                        name=test_name,
+                        status="error",
+                        duration_seconds=time.monotonic() - start,
+                        error=str(e),
+                    )
+
+                # Don't use communicate() here: cancelling it on timeout
+                # leaves the transport in a state where every later await
+                # on the process can hang. Instead, drain the pipe with an
+                # independent reader task and supervise the child with a
+                # timed wait(); the reader stays valid across a timeout.
+                stdout_task = asyncio.ensure_future(proc.stdout.read())
+
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=self.timeout)
+
+                    # The test exited; give its output (and any lingering
+                    # background children holding the pipe) the remainder
+                    # of the budget to reach EOF.
+                    remaining = self.timeout - (time.monotonic() - start)
+                    stdout = await asyncio.wait_for(
+                        stdout_task, timeout=max(remaining, 0.1)
+                    )
+                except asyncio.TimeoutError:
+                    self._kill_test_session(proc)
+                    # With the whole group gone the pipe hits EOF, so the
+                    # reader finishes (or was already cancelled by the
+                    # wait_for above) and the child gets reaped.
+                    await asyncio.gather(stdout_task, return_exceptions=True)
+                    await proc.wait()
+                    return TestResult(
+                        name=test_name,
+                        status="timeout",
+                        duration_seconds=time.monotonic() - start,
+                        error=f"timed out after {self.timeout}s",
+                    )
+
+                return self._judge_output(
+                    test_name, stdout, time.monotonic() - start
+                )
+            finally:
+                test_output_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _kill_test_session(proc):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _report_result(self, result: TestResult):
+        if result.status == "pass":
+            if self.verbose:
+                sys.stderr.write(
+                    f"\r{self._status_labels['pass']} {result.name} "
+                    f"({result.duration_seconds:.2f}s)\033[K\n"
+                )
+        else:
+            label = self._status_labels[result.status]
+            sys.stderr.write(
+                f"\r{label} {result.name} "
+                f"({result.duration_seconds:.2f}s)\033[K\n"
+            )
+            if self.verbose and result.error:
+                sys.stderr.write(result.error + "\n")
+
+
+def print_summary(suite_result: SuiteResult):
+    total = len(suite_result.tests)
+
+    sys.stderr.write(
+        f"{bold('results')}: {total} tests in "
+        f"{suite_result.duration_seconds:.1f}s: "
+        f"{colorize(str(suite_result.passed_count) + ' passed', Colors.GREEN)}, "
+        f"{colorize(str(suite_result.failed_count) + ' failed', Colors.RED)}, "
+        f"{suite_result.timeout_count} timed out, "
+        f"{suite_result.error_count} errored\n"
+    )
+
+
+# Cap on how much per-test output/error text is kept in JSON reports.
+_MAX_REPORT_FIELD_BYTES = 64 * 1024
+
+
+def write_json_report(suite_result: SuiteResult, report_path: str):
+    # Stream one test entry at a time rather than materializing the whole
+    # suite through asdict(), which would recursively copy every result
+    # (including large outputs and diffs) into a second tree just for the
+    # serializer to walk.
+    def truncated(text: str) -> str:
+        if len(text) <= _MAX_REPORT_FIELD_BYTES:
+            return text
+        return text[:_MAX_REPORT_FIELD_BYTES] + "... (truncated)"
+
+    with open(report_path, "w") as file:
+        file.write(
+            json.dumps(
+                {
+                    "suite_name": suite_result.suite_name,
+                    "duration_seconds": suite_result.duration_seconds,
+                    "passed_count": suite_result.passed_count,
+                    "failed_count": suite_result.failed_count,
+                    "timeout_count": suite_result.timeout_count,
+                    "error_count": suite_result.error_count,
+                }
+            )[:-1]
+        )
+        file.write(', "tests": [\n')
+
+        for index, result in enumerate(suite_result.tests):
+            if index:
+                file.write(",\n")
+            json.dump(
+                {
+                    "name": result.name,
+                    "status": result.status,
+                    "duration_seconds": result.duration_seconds,
+                    "output": truncated(result.output),
+                    "error": truncated(result.error),
+                },
+                file,
+            )
+
+        file.write("\n]}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run tests from bash's test suite against brush."
+    )
+    parser.add_argument(
+        "--shell",
+        dest="shell",
+        type=str,
+        default="target/release/brush",
+        help="Path to the shell under test",
+    )
+    parser.add_argument(
+        "--tests-dir",
+        dest="tests_dir",
+        type=str,
+        required=True,
+        help="Path to a checkout of bash's tests/ directory",
+    )
+    parser.add_argument(
+        "--suite",
+        dest="suite",
+        type=str,
+        help="Run the tests belonging to a run-<name> suite script",
+    )
+    parser.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Number of tests to run concurrently",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT_SECONDS,
+        help="Per-test timeout in seconds",
+    )
+    parser.add_argument(
+        "--list",
+        dest="list_tests",
+        action="store_true",
+        help="List available tests (or suites, with --suites) and exit",
+    )
+    parser.add_argument(
+        "--suites",
+        dest="list_suites",
+        action="store_true",
+        help="With --list, list run-<name> suite scripts instead of tests",
+    )
+    parser.add_argument(
+        "--json-report",
+        dest="json_report",
+        type=str,
+        help="Write a JSON report of all results to the given path",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="verbose",
+        action="store_true",
+        help="Report passing tests and failure diffs as they complete",
+    )
+    parser.add_argument(
+        "tests",
+        nargs="*",
+        help="Names of individual tests to run (default: all)",
+    )
+
+    args = parser.parse_args()
+
+    tests_dir = Path(args.tests_dir)
+    if not tests_dir.is_dir():
+        sys.stderr.write(f"error: not a directory: {tests_dir}\n")
+        sys.exit(1)
+
+    runner = BashTestRunner(
+        args.shell, tests_dir, timeout=args.timeout, verbose=args.verbose
+    )
+
+    if args.list_tests:
+        if args.list_suites:
+            with os.scandir(runner.tests_dir) as entries:
+                suite_names = sorted(
+                    entry.name[len("run-"):]
+                    for entry in entries
+                    if entry.name.startswith("run-") and entry.is_file()
+                )
+            for suite_name in suite_names:
+                print(suite_name)
+        else:
+            for test_name in runner.list_tests():
+                print(test_name)
+        return
+
+    if args.suite:
+        suite_name = args.suite
+        tests = runner.get_suite_tests(suite_name)
+    elif args.tests:
+        suite_name = "selected"
+        tests = args.tests
+    else:
+        suite_name = "all"
+        tests = runner.list_tests()
+
+    if not tests:
+        sys.stderr.write("error: no tests found\n")
+        sys.exit(1)
+
+    suite_result = runner.run_suite(suite_name, tests, jobs=args.jobs)
+
+    print_summary(suite_result)
+
+    if args.json_report:
+        write_json_report(suite_result, args.json_report)
+
+    sys.exit(
+        0
+        if suite_result.failed_count
+        + suite_result.timeout_count
+        + suite_result.error_count
+        == 0
+        else 1
+    )
+
+
+if __name__ == "__main__":
+    main()
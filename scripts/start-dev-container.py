@@ -52,7 +52,65 @@ if not os.path.isdir(os.path.join(source_root, ".devcontainer")):
     sys.stderr.write("error: couldn't find repo root\n")
     sys.exit(1)
 
-if not shutil.which("devcontainer"):
+cache_file_path = os.path.expanduser("~/.cache/brush-devcontainer.json")
+
+
+def load_cached_container():
+    # Returns (container_id, remote_workspace_folder) from the last
+    # successful start-up, if the cached container is still running.
+    try:
+        with open(cache_file_path, "r") as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get("sourceRoot") != os.path.abspath(source_root):
+        return None
+
+    container_id = cached.get("containerId")
+    remote_workspace_folder = cached.get("remoteWorkspaceFolder")
+    if not container_id or not remote_workspace_folder:
+        return None
+
+    inspect_result = subprocess.run(
+        ["docker", "container", "inspect", "-f", "{{.State.Running}}", container_id],
+        check=False,
+        capture_output=True,
+    )
+    if inspect_result.returncode != 0 or inspect_result.stdout.strip() != b"true":
+        return None
+
+    return container_id, remote_workspace_folder
+
+
+def save_cached_container(container_id, remote_workspace_folder):
+    try:
+        os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+        with open(cache_file_path, "w") as cache_file:
+            json.dump(
+                {
+                    "sourceRoot": os.path.abspath(source_root),
+                    "containerId": container_id,
+                    "remoteWorkspaceFolder": remote_workspace_folder,
+                },
+                cache_file,
+            )
+    except OSError:
+        pass  # Best-effort; next run just takes the slow path.
+
+
+container_id = None
+remote_workspace_folder = None
+
+# Fast path for the common case of re-entering an already-running
+# container: a `docker container inspect` of the cached container ID is
+# much cheaper than a `devcontainer up` round-trip.
+if not args.restart_container:
+    cached_container = load_cached_container()
+    if cached_container:
+        container_id, remote_workspace_folder = cached_container
+
+if container_id is None and not shutil.which("devcontainer"):
     sys.stderr.write(
         "error: couldn't find devcontainer CLI; did you install it as a prerequisite?\n"
     )
@@ -80,36 +138,39 @@ if args.rebuild_container_image or args.restart_container:
 
     subprocess.run(restart_args, check=True, capture_output=args.quiet)
 
-if not args.quiet:
-    sys.stderr.write("Ensuring devcontainer is up...\n")
+if container_id is None:
+    if not args.quiet:
+        sys.stderr.write("Ensuring devcontainer is up...\n")
 
-up_result = subprocess.run(devcontainer_cli_args, check=False, capture_output=True)
+    up_result = subprocess.run(devcontainer_cli_args, check=False, capture_output=True)
 
-if up_result.returncode != 0:
-    sys.stderr.write("error: devcontainer start-up failed\n")
-    sys.stderr.write(up_result.stderr.decode("utf-8"))
-    sys.exit(1)
+    if up_result.returncode != 0:
+        sys.stderr.write("error: devcontainer start-up failed\n")
+        sys.stderr.write(up_result.stderr.decode("utf-8"))
+        sys.exit(1)
 
-result_data = json.loads(up_result.stdout.decode("utf-8"))
+    result_data = json.loads(up_result.stdout.decode("utf-8"))
 
-if "outcome" not in result_data:
-    sys.stderr.write("error: couldn't determine outcome of devcontainer start-up\n")
-    sys.exit(1)
+    if "outcome" not in result_data:
+        sys.stderr.write("error: couldn't determine outcome of devcontainer start-up\n")
+        sys.exit(1)
 
-if result_data["outcome"] != "success":
-    sys.stderr.write("error: devcontainer start-up failed\n")
-    sys.exit(1)
+    if result_data["outcome"] != "success":
+        sys.stderr.write("error: devcontainer start-up failed\n")
+        sys.exit(1)
 
-if "containerId" not in result_data:
-    sys.stderr.write("error: couldn't determine container ID\n")
-    sys.exit(1)
+    if "containerId" not in result_data:
+        sys.stderr.write("error: couldn't determine container ID\n")
+        sys.exit(1)
 
-if "remoteWorkspaceFolder" not in result_data:
-    sys.stderr.write("error: couldn't determine remote workspace folder\n")
-    sys.exit(1)
+    if "remoteWorkspaceFolder" not in result_data:
+        sys.stderr.write("error: couldn't determine remote workspace folder\n")
+        sys.exit(1)
+
+    container_id = result_data["containerId"]
+    remote_workspace_folder = result_data["remoteWorkspaceFolder"]
 
-container_id = result_data["containerId"]
-remote_workspace_folder = result_data["remoteWorkspaceFolder"]
+    save_cached_container(container_id, remote_workspace_folder)
 
 if not args.quiet:
     sys.stderr.write("Launching shell in devcontainer...\n")
@@ -130,8 +191,8 @@ exec_args.append(container_id)
 
 exec_args += shlex.split(args.command)
 
-exec_result = subprocess.run(exec_args, check=False)
-
-sys.stderr.write("Command exited; devcontainer will remain running.\n")
-
-sys.exit(exec_result.returncode)
+# Replace this process with docker rather than forking a child and
+# waiting on it; the exit code propagates directly and the Python
+# interpreter isn't kept resident for the duration of the session.
+sys.stderr.flush()
+os.execvp(exec_args[0], exec_args)
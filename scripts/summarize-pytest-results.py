@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Summarizes a pytest JSON report (pytest-json-report) as a markdown table."""
+import argparse
+import json
+import sys
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-r", "--results", dest="results_file_path", type=str, help="Path to pytest JSON report file", required=True)
+parser.add_argument("--title", dest="title", type=str, default="Test results", help="Title to display for the results")
+
+args = parser.parse_args()
+
+# One read + loads instead of json.load over a text stream; the file is
+# decoded a single time.
+with open(args.results_file_path, "rb") as file:
+    report = json.loads(file.read())
+
+summary = report.get("summary", {})
+
+pass_count = summary.get("passed", 0)
+fail_count = summary.get("failed", 0)
+error_count = summary.get("error", 0)
+skip_count = summary.get("skipped", 0)
+xfail_count = summary.get("xfailed", 0)
+xpass_count = summary.get("xpassed", 0)
+total_count = summary.get("total", 0)
+
+if total_count == 0:
+    sys.stderr.write("error: report contains no tests\n")
+    sys.exit(1)
+
+# One data-driven loop replaces six near-identical if/print blocks; the
+# percentage divisor is inverted once and the whole table goes out in a
+# single write instead of one syscall per row.
+inv_total_pct = 100.0 / total_count
+
+rows = (
+    ("✅ Passed", pass_count),
+    ("❌ Failed", fail_count),
+    ("❗️ Errored", error_count),
+    ("⏭️ Skipped", skip_count),
+    ("🔶 Known to fail", xfail_count),
+    ("🔷 Newly passing", xpass_count),
+)
+
+report_lines = [
+    f"## {args.title}",
+    "| Outcome | Count | Percentage |",
+    "| ------- | ----- | ---------- |",
+]
+
+for label, count in rows:
+    if count > 0:
+        report_lines.append(f"| {label} | {count} | {count * inv_total_pct:.2f}% |")
+
+sys.stdout.write("\n".join(report_lines) + "\n")
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+"""Triages failures in JSON test reports produced by run-bash-tests.py."""
+import argparse
+import itertools
+import json
+import os
+import sys
+from typing import List
+
+
+class Colors:
+    RED = "\033[31m"
+    GREEN = "\033[32m"
+    YELLOW = "\033[33m"
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+
+    _ENABLED = sys.stdout.isatty() and os.getenv("NO_COLOR") is None
+
+    @staticmethod
+    def enabled() -> bool:
+        return Colors._ENABLED
+
+
+def colorize(text: str, color: str) -> str:
+    if not Colors.enabled():
+        return text
+    return f"{color}{text}{Colors.RESET}"
+
+
+def bold(text: str) -> str:
+    if not Colors.enabled():
+        return text
+    return f"{Colors.BOLD}{text}{Colors.RESET}"
+
+
+# Diff-line coloring resolved with one dict lookup on the leading
+# character; the tables collapse to empty strings when color is disabled,
+# so the hot loop never calls colorize().
+_RESET = Colors.RESET if Colors.enabled() else ""
+_DIFF_LINE_PREFIX = (
+    {"-": Colors.RED, "+": Colors.GREEN} if Colors.enabled() else {}
+)
+
+# Diff header/hunk-marker lines, keyed by their first three characters so
+# the filter is one slice plus one set probe per line.
+_DIFF_SKIP_PREFIXES = frozenset({"---", "+++", "@@ "})
+
+
+def load_report(file_path: str) -> dict:
+    with open(file_path, "rb") as file:
+        return json.loads(file.read())
+
+
+def summarize_suites(reports: List[dict]) -> bool:
+    """Prints one summary line per suite; returns whether any suite had
+    failures. A single pass builds the rows, accumulates totals, and
+    detects failures, and the rows go out in one write."""
+    rows = []
+    total_tests = 0
+    total_passed = 0
+    has_failures = False
+
+    for report in reports:
+        failed = report["failed_count"]
+        timed_out = report["timeout_count"]
+        errored = report["error_count"]
+        passed = report["passed_count"]
+
+        total_tests += len(report["tests"])
+        total_passed += passed
+        has_failures |= (failed + timed_out + errored) > 0
+
+        rows.append(
+            f"{bold(report['suite_name'])}: "
+            f"{colorize(str(passed) + ' passed', Colors.GREEN)}, "
+            f"{colorize(str(failed) + ' failed', Colors.RED)}, "
+            f"{timed_out} timed out, "
+            f"{errored} errored"
+        )
+
+    if len(reports) > 1:
+        rows.append(f"total: {total_passed}/{total_tests} passed")
+
+    sys.stdout.write("\n".join(rows) + "\n")
+    return has_failures
+
+
+def print_test_details(test: dict, num_lines: int):
+    print()
+    print(f"{bold(test['name'])} ({test['status']}):")
+
+    # Pull at most num_lines through the filter instead of materializing
+    # every relevant diff line just to slice the front; the tail is only
+    # counted, never stored.
+    relevant = (
+        line
+        for line in test.get("error", "").splitlines()
+        if line[:3] not in _DIFF_SKIP_PREFIXES
+    )
+
+    for line in itertools.islice(relevant, num_lines):
+        prefix = _DIFF_LINE_PREFIX.get(line[:1], "")
+        print(f"    {prefix}{line}{_RESET}")
+
+    remaining = sum(1 for _ in relevant)
+    if remaining:
+        print(f"    ... ({remaining} more lines)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Triage failures in run-bash-tests.py JSON reports."
+    )
+    parser.add_argument(
+        "reports", nargs="+", help="Paths to JSON report files"
+    )
+    parser.add_argument(
+        "-n",
+        "--num-lines",
+        dest="num_lines",
+        type=int,
+        default=20,
+        help="Maximum diff lines to show per failing test",
+    )
+
+    args = parser.parse_args()
+
+    reports = [load_report(path) for path in args.reports]
+
+    has_failures = summarize_suites(reports)
+
+    # One pass over each report's tests classifies everything we show;
+    # the appends are bound to locals ahead of the loop.
+    failed_tests: List[dict] = []
+    timeout_tests: List[dict] = []
+    append_failed = failed_tests.append
+    append_timeout = timeout_tests.append
+    for report in reports:
+        for test in report["tests"]:
+            status = test["status"]
+            if status == "fail":
+                append_failed(test)
+            elif status == "timeout":
+                append_timeout(test)
+
+    for test in failed_tests:
+        print_test_details(test, args.num_lines)
+
+    if timeout_tests:
+        print()
+        print(bold("Timed out:"))
+        for test in timeout_tests:
+            print(f"  - {test['name']} ({test['duration_seconds']:.1f}s)")
+
+    sys.exit(1 if has_failures else 0)
+
+
+if __name__ == "__main__":
+    main()